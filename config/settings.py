@@ -1,106 +1,126 @@
 """
 Project configuration settings.
 """
+import logging
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
-# Try to import from pydantic_settings first (Pydantic v2)
-try:
-    from pydantic_settings import BaseSettings, SettingsConfigDict
-    PYDANTIC_V2 = True
-except ImportError:
-    # Fall back to pydantic for older versions
-    from pydantic import BaseSettings
-    PYDANTIC_V2 = False
+# Project paths - DYNAMIC, not hardcoded!
+_BASE_DIR = Path(__file__).resolve().parent.parent
+_DATA_DIR = _BASE_DIR / "data"
 
-from pydantic import Field
+logger = logging.getLogger(__name__)
 
 
-class Settings(BaseSettings):
+def _env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string variable from the environment (names match case-insensitively)."""
+    value = os.getenv(name)
+    if value is None:
+        # Same lookup rule as the former pydantic-settings config
+        lowered = name.lower()
+        value = next((v for k, v in os.environ.items() if k.lower() == lowered), None)
+    return value if value not in (None, "") else default
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    """Read an integer variable ("null"/"none" map to None)."""
+    value = _env_str(name)
+    if value is None:
+        return default
+    if value.lower() in ("null", "none"):
+        return None
+    return int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean variable."""
+    value = _env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+@lru_cache(maxsize=8)
+def _database_path(database_url: Optional[str], database_dir: Path) -> Path:
+    """Resolve the database file path (memoized; Settings uses __slots__)."""
+    if database_url:
+        # Extract path from URL if provided
+        if database_url.startswith("sqlite:///"):
+            return Path(database_url.replace("sqlite:///", ""))
+    return database_dir / "stellar.db"
+
+
+def _load_env_file(path: Path) -> None:
+    """Load .env into os.environ if python-dotenv is available."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        if path.is_file():
+            logger.warning("python-dotenv is not installed; ignoring %s", path)
+        return
+    load_dotenv(path, encoding="utf-8")
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     """Application settings."""
-    
-    # Configure for Pydantic v2 if available
-    if PYDANTIC_V2:
-        model_config = SettingsConfigDict(
-            env_file=".env",
-            env_file_encoding="utf-8",
-            case_sensitive=False,
-            extra="allow",
-            env_prefix=""
-        )
-    
-    # Project paths - DYNAMIC, not hardcoded!
-    BASE_DIR: Path = Path(__file__).resolve().parent.parent
-    DATA_DIR: Path = BASE_DIR / "data"
-    RAW_DATA_DIR: Path = DATA_DIR / "raw"
-    PROCESSED_DATA_DIR: Path = DATA_DIR / "processed"
-    CACHE_DIR: Path = DATA_DIR / "cache"
-    DATABASE_DIR: Path = BASE_DIR / "database"
-    
+
+    # Project paths
+    BASE_DIR: Path = _BASE_DIR
+    DATA_DIR: Path = _DATA_DIR
+    RAW_DATA_DIR: Path = _DATA_DIR / "raw"
+    PROCESSED_DATA_DIR: Path = _DATA_DIR / "processed"
+    CACHE_DIR: Path = _DATA_DIR / "cache"
+    DATABASE_DIR: Path = _BASE_DIR / "database"
+
     # Database
-    DATABASE_URL: Optional[str] = Field(default=None)
-    
+    DATABASE_URL: Optional[str] = None
+
     # Stellar API
-    HORIZON_URL: str = Field(
-        default="https://horizon.stellar.org",
-        description="Stellar Horizon mainnet URL"
-    )
-    HORIZON_TESTNET_URL: str = Field(
-        default="https://horizon-testnet.stellar.org",
-        description="Stellar Horizon testnet URL"
-    )
-    USE_TESTNET: bool = Field(
-        default=False,
-        description="Use testnet instead of mainnet"
-    )
-    
+    HORIZON_URL: str = "https://horizon.stellar.org"  # Stellar Horizon mainnet URL
+    HORIZON_TESTNET_URL: str = "https://horizon-testnet.stellar.org"  # Stellar Horizon testnet URL
+    USE_TESTNET: bool = False  # Use testnet instead of mainnet
+
     # API Settings
-    API_RATE_LIMIT: int = Field(default=100)
-    API_TIMEOUT: int = Field(default=30)
-    API_MAX_RETRIES: int = Field(default=3)
-    
+    API_RATE_LIMIT: int = 100
+    API_TIMEOUT: int = 30
+    API_MAX_RETRIES: int = 3
+    API_MAX_INFLIGHT: int = 20  # Concurrent HTTP requests to Horizon per client
+
     # Cache Settings
-    CACHE_ENABLED: bool = Field(default=True)
-    CACHE_TTL: int = Field(default=3600)  # seconds
-    
+    CACHE_ENABLED: bool = False  # Opt-in: persist Horizon responses under CACHE_DIR
+    CACHE_TTL: int = 3600  # seconds
+
     # Data Processing - INCREASED LIMITS!
-    BATCH_SIZE: int = Field(default=50)
-    MAX_WALLETS: Optional[int] = Field(default=200)  # Increased from 100
-    MAX_TRANSACTIONS_PER_WALLET: int = Field(default=10000)  # Increased from 200!
-    DEFAULT_WALLET_LIMIT: int = Field(default=100)  # Increased from 50
-    DEFAULT_MAX_PAGES: int = Field(default=50)  # Increased from implicit 25!
-    
+    BATCH_SIZE: int = 50
+    MAX_WALLETS: Optional[int] = 200  # Increased from 100
+    MAX_TRANSACTIONS_PER_WALLET: int = 10000  # Increased from 200!
+    DEFAULT_WALLET_LIMIT: int = 100  # Increased from 50
+    DEFAULT_MAX_PAGES: int = 50  # Increased from implicit 25!
+
     # Visualization
-    GRAPH_MAX_NODES: int = Field(default=200)  # Increased from 100
-    GRAPH_MAX_EDGES: int = Field(default=1000)  # Increased from 500
-    DEFAULT_LAYOUT: str = Field(default="force")
-    
+    GRAPH_MAX_NODES: int = 200  # Increased from 100
+    GRAPH_MAX_EDGES: int = 1000  # Increased from 500
+    DEFAULT_LAYOUT: str = "force"
+
     # Performance thresholds
-    PERFORMANCE_WARNING_NODES: int = Field(default=150)
-    PERFORMANCE_MAX_NODES: int = Field(default=200)
-    
+    PERFORMANCE_WARNING_NODES: int = 150
+    PERFORMANCE_MAX_NODES: int = 200
+
     # Web App
-    APP_HOST: str = Field(default="0.0.0.0")
-    APP_PORT: int = Field(default=8501)
-    DEBUG: bool = Field(default=False)
-    
+    APP_HOST: str = "0.0.0.0"
+    APP_PORT: int = 8501
+    DEBUG: bool = False
+
     # Logging
-    LOG_LEVEL: str = Field(default="INFO")
-    LOG_FILE: Optional[str] = Field(default="stellar_viz.log")
-    
-    # Pydantic v1 configuration
-    if not PYDANTIC_V2:
-        class Config:
-            env_file = ".env"
-            env_file_encoding = "utf-8"
-            case_sensitive = False
-            extra = "allow"
-    
-    def __init__(self, **kwargs):
-        """Initialize settings with defaults."""
-        super().__init__(**kwargs)
-        # Create directories if they don't exist
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: Optional[str] = "stellar_viz.log"
+
+    def create_directories(self):
+        """Create data directories if they don't exist."""
         for dir_path in [
             self.DATA_DIR,
             self.RAW_DATA_DIR,
@@ -108,22 +128,91 @@ class Settings(BaseSettings):
             self.CACHE_DIR,
             self.DATABASE_DIR
         ]:
-            dir_path.mkdir(parents=True, exist_ok=True)
-    
+            if not os.path.isdir(dir_path):
+                dir_path.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, env_file: Optional[Path] = None) -> "Settings":
+        """
+        Build settings from environment variables (and .env, if present).
+
+        Args:
+            env_file: Path to .env file (defaults to BASE_DIR/.env)
+
+        Returns:
+            Settings instance
+        """
+        _load_env_file(env_file or _BASE_DIR / ".env")
+        defaults = cls.__dataclass_fields__
+
+        def default(name: str):
+            return defaults[name].default
+
+        return cls(
+            DATABASE_URL=_env_str("DATABASE_URL"),
+            HORIZON_URL=_env_str("HORIZON_URL") or _env_str("STELLAR_HORIZON_URL", default("HORIZON_URL")),
+            HORIZON_TESTNET_URL=(
+                _env_str("HORIZON_TESTNET_URL")
+                or _env_str("STELLAR_HORIZON_TESTNET_URL", default("HORIZON_TESTNET_URL"))
+            ),
+            USE_TESTNET=_env_bool("USE_TESTNET", default("USE_TESTNET")),
+            API_RATE_LIMIT=_env_int("API_RATE_LIMIT", default("API_RATE_LIMIT")),
+            API_TIMEOUT=_env_int("API_TIMEOUT", default("API_TIMEOUT")),
+            API_MAX_RETRIES=_env_int("API_MAX_RETRIES", default("API_MAX_RETRIES")),
+            API_MAX_INFLIGHT=_env_int("API_MAX_INFLIGHT", default("API_MAX_INFLIGHT")),
+            CACHE_ENABLED=_env_bool("CACHE_ENABLED", default("CACHE_ENABLED")),
+            CACHE_TTL=_env_int("CACHE_TTL", default("CACHE_TTL")),
+            BATCH_SIZE=_env_int("BATCH_SIZE", default("BATCH_SIZE")),
+            MAX_WALLETS=_env_int("MAX_WALLETS", default("MAX_WALLETS")),
+            MAX_TRANSACTIONS_PER_WALLET=_env_int(
+                "MAX_TRANSACTIONS_PER_WALLET", default("MAX_TRANSACTIONS_PER_WALLET")
+            ),
+            DEFAULT_WALLET_LIMIT=_env_int("DEFAULT_WALLET_LIMIT", default("DEFAULT_WALLET_LIMIT")),
+            DEFAULT_MAX_PAGES=_env_int("DEFAULT_MAX_PAGES", default("DEFAULT_MAX_PAGES")),
+            GRAPH_MAX_NODES=_env_int("GRAPH_MAX_NODES", default("GRAPH_MAX_NODES")),
+            GRAPH_MAX_EDGES=_env_int("GRAPH_MAX_EDGES", default("GRAPH_MAX_EDGES")),
+            DEFAULT_LAYOUT=_env_str("DEFAULT_LAYOUT", default("DEFAULT_LAYOUT")),
+            PERFORMANCE_WARNING_NODES=_env_int(
+                "PERFORMANCE_WARNING_NODES", default("PERFORMANCE_WARNING_NODES")
+            ),
+            PERFORMANCE_MAX_NODES=_env_int("PERFORMANCE_MAX_NODES", default("PERFORMANCE_MAX_NODES")),
+            APP_HOST=_env_str("APP_HOST", default("APP_HOST")),
+            APP_PORT=_env_int("APP_PORT", default("APP_PORT")),
+            DEBUG=_env_bool("DEBUG", default("DEBUG")),
+            LOG_LEVEL=_env_str("LOG_LEVEL", default("LOG_LEVEL")),
+            LOG_FILE=_env_str("LOG_FILE", default("LOG_FILE")),
+        )
+
     @property
     def horizon_url(self) -> str:
         """Get the appropriate Horizon URL based on network setting."""
         return self.HORIZON_TESTNET_URL if self.USE_TESTNET else self.HORIZON_URL
-    
+
     @property
     def database_path(self) -> Path:
         """Get database file path."""
-        if self.DATABASE_URL:
-            # Extract path from URL if provided
-            if self.DATABASE_URL.startswith("sqlite:///"):
-                return Path(self.DATABASE_URL.replace("sqlite:///", ""))
-        return self.DATABASE_DIR / "stellar.db"
+        return _database_path(self.DATABASE_URL, self.DATABASE_DIR)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings instance (built once, then cached)."""
+    return Settings.from_env()
+
+
+def bootstrap_filesystem() -> Settings:
+    """
+    Prepare the on-disk data tree. Call once from entrypoints.
+
+    Importing this module no longer touches the filesystem.
+    """
+    current = get_settings()
+    current.create_directories()
+    return current
 
 
-# Create global settings instance
-settings = Settings()
+def __getattr__(name: str):
+    """Resolve the legacy ``settings`` global lazily (PEP 562)."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
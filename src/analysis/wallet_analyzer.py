@@ -4,6 +4,7 @@ Wallet analyzer for ranking and analyzing wallet activity.
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
+import hashlib
 import pandas as pd
 import numpy as np
 import logging
@@ -14,6 +15,9 @@ logger = logging.getLogger(__name__)
 class WalletAnalyzer:
     """Analyze and rank wallets based on various metrics."""
     
+    # Betweenness is estimated from this many source nodes on larger graphs
+    BETWEENNESS_SAMPLE_SIZE = 256
+    
     def __init__(self):
         """Initialize wallet analyzer."""
         self.metrics_cache = {}
@@ -33,68 +37,88 @@ class WalletAnalyzer:
         Returns:
             DataFrame with wallet metrics
         """
-        metrics = []
-        
-        for wallet_id, wallet_data in wallets.items():
-            # Calculate transaction metrics
-            tx_metrics = self._calculate_transaction_metrics(wallet_id, transactions)
+        tx_df = self._transaction_frame(transactions)
+        cache_key = self._metrics_cache_key(wallets, tx_df)
+        cached = self.metrics_cache.get(cache_key)
+        if cached is not None:
+            return cached.copy()
+        
+        wallet_ids = list(wallets.keys())
+        soa = self._prepare(wallets, transactions, tx_df=tx_df)
+        
+        # Per-wallet aggregates, computed in one pass over the transactions
+        tx_metrics = self._aggregate_transaction_metrics(soa)
+        network_metrics = self._aggregate_network_metrics(soa)
+        
+        df = pd.DataFrame({
+            "wallet_id": wallet_ids,
+            "wallet_short": [f"{wallet_id[:8]}...{wallet_id[-6:]}" for wallet_id in wallet_ids],
             
-            # Calculate network metrics
-            network_metrics = self._calculate_network_metrics(wallet_id, transactions)
+            # Balance metrics
+            "balance_xlm": np.fromiter(
+                (float(wallet_data.get("balance_xlm", 0)) for wallet_data in wallets.values()),
+                dtype=np.float64,
+                count=len(wallets)
+            ),
             
-            # Combine all metrics
-            wallet_metrics = {
-                "wallet_id": wallet_id,
-                "wallet_short": f"{wallet_id[:8]}...{wallet_id[-6:]}",
-                
-                # Balance metrics
-                "balance_xlm": float(wallet_data.get("balance_xlm", 0)),
-                
-                # Transaction metrics
-                "total_transactions": tx_metrics["total"],
-                "sent_transactions": tx_metrics["sent"],
-                "received_transactions": tx_metrics["received"],
-                "total_volume": tx_metrics["total_volume"],
-                "sent_volume": tx_metrics["sent_volume"],
-                "received_volume": tx_metrics["received_volume"],
-                "avg_transaction_size": tx_metrics["avg_size"],
-                
-                # Network metrics
-                "unique_counterparties": network_metrics["unique_counterparties"],
-                "in_degree": network_metrics["in_degree"],
-                "out_degree": network_metrics["out_degree"],
-                "clustering_coefficient": network_metrics["clustering"],
-                
-                # Activity metrics
-                "first_transaction": tx_metrics["first_tx"],
-                "last_transaction": tx_metrics["last_tx"],
-                "days_active": tx_metrics["days_active"],
-                
-                # Scoring
-                "activity_score": self._calculate_activity_score(tx_metrics, network_metrics),
-                "influence_score": self._calculate_influence_score(tx_metrics, network_metrics),
-            }
+            # Transaction metrics
+            "total_transactions": tx_metrics["total"].to_numpy(),
+            "sent_transactions": tx_metrics["sent"].to_numpy(),
+            "received_transactions": tx_metrics["received"].to_numpy(),
+            "total_volume": tx_metrics["total_volume"].to_numpy(),
+            "sent_volume": tx_metrics["sent_volume"].to_numpy(),
+            "received_volume": tx_metrics["received_volume"].to_numpy(),
+            "avg_transaction_size": tx_metrics["avg_size"].to_numpy(),
             
-            metrics.append(wallet_metrics)
-        
-        df = pd.DataFrame(metrics)
+            # Network metrics
+            "unique_counterparties": network_metrics["unique_counterparties"].to_numpy(),
+            "in_degree": network_metrics["in_degree"].to_numpy(),
+            "out_degree": network_metrics["out_degree"].to_numpy(),
+            "clustering_coefficient": network_metrics["clustering"].to_numpy(),
+            
+            # Activity metrics
+            "first_transaction": tx_metrics["first_tx"].array,
+            "last_transaction": tx_metrics["last_tx"].array,
+            "days_active": tx_metrics["days_active"].to_numpy(),
+            
+            # Scoring
+            "activity_score": self._calculate_activity_score(tx_metrics, network_metrics).to_numpy(),
+            "influence_score": self._calculate_influence_score(tx_metrics, network_metrics).to_numpy(),
+        })
         
         # Calculate relative rankings
         if not df.empty:
-            df["volume_rank"] = df["total_volume"].rank(ascending=False, method="min")
-            df["transaction_rank"] = df["total_transactions"].rank(ascending=False, method="min")
-            df["counterparty_rank"] = df["unique_counterparties"].rank(ascending=False, method="min")
-            df["activity_rank"] = df["activity_score"].rank(ascending=False, method="min")
+            from scipy.stats import rankdata
+            
+            volume_rank = rankdata(-df["total_volume"].to_numpy(), method="min").astype(np.float64)
+            transaction_rank = rankdata(-df["total_transactions"].to_numpy(), method="min").astype(np.float64)
+            counterparty_rank = rankdata(-df["unique_counterparties"].to_numpy(), method="min").astype(np.float64)
+            activity_rank = rankdata(-df["activity_score"].to_numpy(), method="min").astype(np.float64)
+            
+            df["volume_rank"] = volume_rank
+            df["transaction_rank"] = transaction_rank
+            df["counterparty_rank"] = counterparty_rank
+            df["activity_rank"] = activity_rank
             
             # Overall rank (weighted average)
-            df["overall_rank"] = (
-                df["volume_rank"] * 0.3 +
-                df["transaction_rank"] * 0.3 +
-                df["counterparty_rank"] * 0.2 +
-                df["activity_rank"] * 0.2
-            ).rank(method="min")
-        
-        return df
+            df["overall_rank"] = rankdata(
+                volume_rank * 0.3 +
+                transaction_rank * 0.3 +
+                counterparty_rank * 0.2 +
+                activity_rank * 0.2,
+                method="min"
+            ).astype(np.float64)
+        
+        # Keep only the latest result; callers get their own copy so edits to a
+        # returned frame never leak into later cache hits
+        self.metrics_cache.clear()
+        self.metrics_cache[cache_key] = df
+        
+        return df.copy()
+    
+    def invalidate_cache(self):
+        """Drop cached wallet metrics."""
+        self.metrics_cache.clear()
     
     def rank_wallets(
         self,
@@ -113,8 +137,22 @@ class WalletAnalyzer:
             top_n: Return only top N wallets
             
         Returns:
-            Ranked list of wallet data
+            Ranked list of wallet data (for by="balance" only wallet_id
+            and balance_xlm, read straight from the wallets dict)
         """
+        if by == "balance":
+            wallet_ids = list(wallets.keys())
+            balances = np.fromiter(
+                (float(wallet_data.get("balance_xlm", 0)) for wallet_data in wallets.values()),
+                dtype=np.float64,
+                count=len(wallets)
+            )
+            order = np.argsort(-balances, kind="stable")[:top_n or len(balances)]
+            return [
+                {"wallet_id": wallet_ids[i], "balance_xlm": float(balances[i])}
+                for i in order
+            ]
+        
         df = self.calculate_wallet_metrics(wallets, transactions)
         
         # Sort by specified metric
@@ -126,8 +164,6 @@ class WalletAnalyzer:
             df = df.sort_values("total_transactions", ascending=False)
         elif by == "influence":
             df = df.sort_values("influence_score", ascending=False)
-        elif by == "balance":
-            df = df.sort_values("balance_xlm", ascending=False)
         else:
             df = df.sort_values("overall_rank")
         
@@ -152,39 +188,36 @@ class WalletAnalyzer:
         Returns:
             Dictionary mapping wallet_id to type
         """
-        wallet_types = {}
         df = self.calculate_wallet_metrics(wallets, transactions)
         
-        for _, row in df.iterrows():
-            wallet_id = row["wallet_id"]
-            
+        if df.empty:
+            return {}
+        
+        # Quantile thresholds are computed once for the whole population
+        volume_hi = df["total_volume"].quantile(0.9)
+        counterparties_hi = df["unique_counterparties"].quantile(0.9)
+        balance_hi = df["balance_xlm"].quantile(0.8)
+        transactions_lo = df["total_transactions"].quantile(0.3)
+        transactions_hi = df["total_transactions"].quantile(0.8)
+        avg_size_lo = df["avg_transaction_size"].quantile(0.3)
+        
+        conditions = [
             # High volume, many counterparties -> likely exchange
-            if (row["total_volume"] > df["total_volume"].quantile(0.9) and
-                row["unique_counterparties"] > df["unique_counterparties"].quantile(0.9)):
-                wallet_types[wallet_id] = "exchange"
-            
+            (df["total_volume"] > volume_hi) & (df["unique_counterparties"] > counterparties_hi),
             # High balance, few transactions -> likely holder
-            elif (row["balance_xlm"] > df["balance_xlm"].quantile(0.8) and
-                  row["total_transactions"] < df["total_transactions"].quantile(0.3)):
-                wallet_types[wallet_id] = "holder"
-            
+            (df["balance_xlm"] > balance_hi) & (df["total_transactions"] < transactions_lo),
             # Many small transactions -> likely bot/trader
-            elif (row["total_transactions"] > df["total_transactions"].quantile(0.8) and
-                  row["avg_transaction_size"] < df["avg_transaction_size"].quantile(0.3)):
-                wallet_types[wallet_id] = "bot_trader"
-            
+            (df["total_transactions"] > transactions_hi) & (df["avg_transaction_size"] < avg_size_lo),
             # High out-degree, low in-degree -> likely distributor
-            elif row["out_degree"] > row["in_degree"] * 2:
-                wallet_types[wallet_id] = "distributor"
-            
+            df["out_degree"] > df["in_degree"] * 2,
             # High in-degree, low out-degree -> likely collector
-            elif row["in_degree"] > row["out_degree"] * 2:
-                wallet_types[wallet_id] = "collector"
-            
-            else:
-                wallet_types[wallet_id] = "regular"
+            df["in_degree"] > df["out_degree"] * 2,
+        ]
+        choices = ["exchange", "holder", "bot_trader", "distributor", "collector"]
         
-        return wallet_types
+        types = np.select(conditions, choices, default="regular")
+        
+        return dict(zip(df["wallet_id"], types.tolist()))
     
     def find_connected_clusters(
         self,
@@ -201,23 +234,40 @@ class WalletAnalyzer:
         Returns:
             List of wallet clusters
         """
-        # Build adjacency list
-        connections = defaultdict(set)
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        
+        # Edge list with integer wallet indices
+        soa = self._prepare({}, transactions)
+        has_parties = (soa["from_idx"] >= 0) & (soa["to_idx"] >= 0)
+        if not has_parties.any():
+            return []
+        
+        wallet_ids = soa["wallet_ids"]
+        n_wallets = len(wallet_ids)
+        
+        # Distinct edges only: one sort instead of summing duplicates in CSR
+        edge_keys = np.unique(
+            soa["from_idx"][has_parties].astype(np.int64) * n_wallets
+            + soa["to_idx"][has_parties]
+        )
+        src, dst = np.divmod(edge_keys, n_wallets)
         
-        for tx in transactions:
-            if "from" in tx and "to" in tx:
-                connections[tx["from"]].add(tx["to"])
-                connections[tx["to"]].add(tx["from"])
+        adjacency = coo_matrix(
+            (np.ones(len(edge_keys), dtype=np.int8), (src, dst)),
+            shape=(n_wallets, n_wallets)
+        ).tocsr()
         
         # Find connected components
-        visited = set()
-        clusters = []
+        _, labels = connected_components(adjacency, directed=False)
         
-        for wallet in connections:
-            if wallet not in visited:
-                cluster = self._dfs_cluster(wallet, connections, visited)
-                if len(cluster) >= min_cluster_size:
-                    clusters.append(list(cluster))
+        order = np.argsort(labels, kind="stable")
+        boundaries = np.cumsum(np.bincount(labels))[:-1]
+        clusters = [
+            wallet_ids[members].tolist()
+            for members in np.split(order, boundaries)
+            if len(members) >= min_cluster_size
+        ]
         
         # Sort clusters by size
         clusters.sort(key=len, reverse=True)
@@ -232,6 +282,9 @@ class WalletAnalyzer:
         """
         Calculate centrality metrics for network analysis.
         
+        Betweenness is an estimate (sampled sources) for graphs larger than
+        BETWEENNESS_SAMPLE_SIZE nodes.
+        
         Args:
             wallets: Dictionary of wallet data
             transactions: List of transaction data
@@ -241,30 +294,50 @@ class WalletAnalyzer:
         """
         import networkx as nx
         
-        # Build network graph
-        G = nx.DiGraph()
+        # Sum transaction amounts per (from, to) pair between known wallets
+        soa = self._prepare(wallets, transactions)
+        n_wallets = soa["n_wallets"]
+        from_idx, to_idx = soa["from_idx"], soa["to_idx"]
+        internal = (from_idx >= 0) & (from_idx < n_wallets) & (to_idx >= 0) & (to_idx < n_wallets)
         
-        for wallet_id in wallets:
-            G.add_node(wallet_id)
+        edges = pd.DataFrame({
+            "from": from_idx[internal],
+            "to": to_idx[internal],
+            "weight": np.nan_to_num(soa["amount"][internal], nan=1.0),
+        }).groupby(["from", "to"], sort=False)["weight"].sum()
         
-        for tx in transactions:
-            if "from" in tx and "to" in tx:
-                if tx["from"] in G and tx["to"] in G:
-                    weight = float(tx.get("amount", 1))
-                    if G.has_edge(tx["from"], tx["to"]):
-                        G[tx["from"]][tx["to"]]["weight"] += weight
-                    else:
-                        G.add_edge(tx["from"], tx["to"], weight=weight)
+        wallet_ids = soa["wallet_ids"]
+        
+        # Build network graph
+        G = nx.DiGraph()
+        G.add_nodes_from(wallets)
+        G.add_weighted_edges_from(
+            (wallet_ids[src], wallet_ids[dst], weight)
+            for (src, dst), weight in edges.items()
+        )
         
         # Calculate centrality metrics
         metrics = []
         
+        n_nodes = G.number_of_nodes()
+        
         degree_centrality = nx.degree_centrality(G)
-        betweenness = nx.betweenness_centrality(G) if G.number_of_nodes() > 2 else {}
-        closeness = nx.closeness_centrality(G) if G.number_of_nodes() > 1 else {}
+        
+        # Exact betweenness is O(N*E); sample sources on large graphs (estimate)
+        if n_nodes > self.BETWEENNESS_SAMPLE_SIZE:
+            betweenness = nx.betweenness_centrality(
+                G, k=self.BETWEENNESS_SAMPLE_SIZE, seed=42, normalized=True
+            )
+        elif n_nodes > 2:
+            betweenness = nx.betweenness_centrality(G)
+        else:
+            betweenness = {}
+        
+        closeness = nx.closeness_centrality(G) if n_nodes > 1 else {}
         
         try:
-            pagerank = nx.pagerank(G, max_iter=100)
+            # NetworkX >= 3 runs PageRank as sparse SciPy power iteration
+            pagerank = nx.pagerank(G, max_iter=100, tol=1e-6)
         except:
             pagerank = {}
         
@@ -279,106 +352,162 @@ class WalletAnalyzer:
         
         return pd.DataFrame(metrics)
     
-    def _calculate_transaction_metrics(
+    def _metrics_cache_key(
         self,
-        wallet_id: str,
-        transactions: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """Calculate transaction-based metrics for a wallet."""
-        sent_txs = []
-        received_txs = []
-        
-        for tx in transactions:
-            if tx.get("from") == wallet_id:
-                sent_txs.append(tx)
-            if tx.get("to") == wallet_id:
-                received_txs.append(tx)
-        
-        all_txs = sent_txs + received_txs
-        
-        # Calculate volumes
-        sent_volume = sum(float(tx.get("amount", 0)) for tx in sent_txs)
-        received_volume = sum(float(tx.get("amount", 0)) for tx in received_txs)
-        total_volume = sent_volume + received_volume
-        
-        # Calculate dates
-        from datetime import datetime
-        dates = []
-        for tx in all_txs:
-            if tx.get("created_at"):
-                date_str = tx["created_at"]
-                # Convert string to datetime if needed
-                if isinstance(date_str, str):
-                    try:
-                        date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                        dates.append(date_obj)
-                    except:
-                        pass
-                else:
-                    dates.append(date_str)
-        
-        first_tx = min(dates) if dates else None
-        last_tx = max(dates) if dates else None
-        
-        days_active = (last_tx - first_tx).days if first_tx and last_tx else 0
+        wallets: Dict[str, Any],
+        tx_df: pd.DataFrame
+    ) -> Tuple:
+        """
+        Build a content key for the metrics cache.
         
-        return {
-            "total": len(all_txs),
-            "sent": len(sent_txs),
-            "received": len(received_txs),
-            "sent_volume": sent_volume,
-            "received_volume": received_volume,
-            "total_volume": total_volume,
-            "avg_size": total_volume / len(all_txs) if all_txs else 0,
-            "first_tx": first_tx,
-            "last_tx": last_tx,
-            "days_active": days_active,
-        }
+        Covers everything the metrics read (wallet ids and balances, and the
+        from/to/amount/created_at columns), so in-place edits miss the cache.
+        """
+        tx_digest = hashlib.blake2b(
+            pd.util.hash_pandas_object(tx_df, index=False).to_numpy().tobytes(),
+            digest_size=16
+        ).digest()
+        return (
+            tuple(
+                (wallet_id, float(wallet_data.get("balance_xlm", 0)))
+                for wallet_id, wallet_data in wallets.items()
+            ),
+            len(tx_df),
+            tx_digest,
+        )
     
-    def _calculate_network_metrics(
+    @staticmethod
+    def _transaction_frame(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Project transactions onto the columns the metrics use."""
+        return pd.DataFrame(transactions, columns=["from", "to", "amount", "created_at"])
+    
+    def _prepare(
         self,
-        wallet_id: str,
-        transactions: List[Dict[str, Any]]
+        wallets: Dict[str, Any],
+        transactions: List[Dict[str, Any]],
+        tx_df: Optional[pd.DataFrame] = None
     ) -> Dict[str, Any]:
-        """Calculate network-based metrics for a wallet."""
-        in_neighbors = set()
-        out_neighbors = set()
-        all_neighbors = set()
-        
-        for tx in transactions:
-            if tx.get("from") == wallet_id and tx.get("to"):
-                out_neighbors.add(tx["to"])
-                all_neighbors.add(tx["to"])
-            if tx.get("to") == wallet_id and tx.get("from"):
-                in_neighbors.add(tx["from"])
-                all_neighbors.add(tx["from"])
-        
-        # Calculate clustering coefficient (simplified)
-        clustering = 0
-        if len(all_neighbors) > 1:
-            # Count edges between neighbors
-            neighbor_edges = 0
-            for tx in transactions:
-                if tx.get("from") in all_neighbors and tx.get("to") in all_neighbors:
-                    neighbor_edges += 1
-            
-            # Calculate clustering coefficient
-            possible_edges = len(all_neighbors) * (len(all_neighbors) - 1)
-            clustering = neighbor_edges / possible_edges if possible_edges > 0 else 0
+        """
+        Convert transactions to struct-of-arrays with integer wallet indices.
+        
+        Wallets from ``wallets`` get indices ``0..n_wallets-1`` in dict order;
+        other counterparties follow. Missing or empty parties map to -1.
+        
+        Returns:
+            Dictionary with wallet_ids, n_wallets, from_idx, to_idx (int32),
+            amount (float64, NaN when missing) and created_at (UTC datetime64)
+        """
+        if tx_df is None:
+            tx_df = self._transaction_frame(transactions)
+        n_wallets, n_tx = len(wallets), len(tx_df)
+        
+        parties = pd.concat(
+            [pd.Series(list(wallets.keys()), dtype=object), tx_df["from"], tx_df["to"]],
+            ignore_index=True
+        )
+        parties = parties.where(parties != "")
+        codes, wallet_ids = pd.factorize(parties)
+        codes = codes.astype(np.int32)
+        
+        created_at = pd.to_datetime(
+            tx_df["created_at"], utc=True, errors="coerce", format="ISO8601"
+        )
         
         return {
-            "unique_counterparties": len(all_neighbors),
-            "in_degree": len(in_neighbors),
-            "out_degree": len(out_neighbors),
-            "clustering": clustering,
+            "wallet_ids": np.asarray(wallet_ids, dtype=object),
+            "n_wallets": n_wallets,
+            "from_idx": codes[n_wallets:n_wallets + n_tx],
+            "to_idx": codes[n_wallets + n_tx:],
+            "amount": pd.to_numeric(tx_df["amount"], errors="coerce").to_numpy(np.float64),
+            "created_at": created_at.dt.tz_convert(None).to_numpy(),
         }
     
+    def _aggregate_transaction_metrics(self, soa: Dict[str, Any]) -> pd.DataFrame:
+        """Calculate transaction-based metrics for all wallets at once."""
+        n_wallets, n_total = soa["n_wallets"], len(soa["wallet_ids"])
+        from_idx, to_idx = soa["from_idx"], soa["to_idx"]
+        amount = np.nan_to_num(soa["amount"])
+        has_from, has_to = from_idx >= 0, to_idx >= 0
+        
+        # Counts and volumes in a single C pass each
+        metrics = pd.DataFrame({
+            "sent": np.bincount(from_idx[has_from], minlength=n_total)[:n_wallets],
+            "received": np.bincount(to_idx[has_to], minlength=n_total)[:n_wallets],
+            "sent_volume": np.bincount(
+                from_idx[has_from], weights=amount[has_from], minlength=n_total
+            )[:n_wallets],
+            "received_volume": np.bincount(
+                to_idx[has_to], weights=amount[has_to], minlength=n_total
+            )[:n_wallets],
+        })
+        
+        metrics["total"] = metrics["sent"] + metrics["received"]
+        metrics["total_volume"] = metrics["sent_volume"] + metrics["received_volume"]
+        metrics["avg_size"] = (
+            metrics["total_volume"] / metrics["total"].where(metrics["total"] > 0)
+        ).fillna(0)
+        
+        # First/last dates as NaT-aware datetime64 reductions
+        created_at = soa["created_at"]
+        first_tx = np.full(n_total, np.datetime64("NaT"), dtype=created_at.dtype)
+        last_tx = first_tx.copy()
+        for idx, mask in ((from_idx, has_from), (to_idx, has_to)):
+            np.fmin.at(first_tx, idx[mask], created_at[mask])
+            np.fmax.at(last_tx, idx[mask], created_at[mask])
+        first_tx, last_tx = first_tx[:n_wallets], last_tx[:n_wallets]
+        
+        span = last_tx - first_tx
+        metrics["first_tx"] = pd.Series(first_tx).dt.tz_localize("UTC")
+        metrics["last_tx"] = pd.Series(last_tx).dt.tz_localize("UTC")
+        metrics["days_active"] = np.where(
+            np.isnat(span), 0, span.astype("timedelta64[D]").astype(np.int64)
+        )
+        
+        metrics.index = soa["wallet_ids"][:n_wallets]
+        return metrics
+    
+    def _aggregate_network_metrics(self, soa: Dict[str, Any]) -> pd.DataFrame:
+        """Calculate network-based metrics for all wallets at once."""
+        n_wallets, n_total = soa["n_wallets"], len(soa["wallet_ids"])
+        from_idx, to_idx = soa["from_idx"], soa["to_idx"]
+        
+        has_parties = (from_idx >= 0) & (to_idx >= 0)
+        src = from_idx[has_parties].astype(np.int64)
+        dst = to_idx[has_parties].astype(np.int64)
+        
+        # Distinct directed edges
+        edge_keys = np.unique(src * n_total + dst)
+        edge_src, edge_dst = np.divmod(edge_keys, n_total)
+        
+        # Distinct undirected (wallet, counterparty) pairs
+        pair_keys = np.unique(np.concatenate([edge_keys, edge_dst * n_total + edge_src]))
+        pair_wallet = pair_keys // n_total
+        
+        metrics = pd.DataFrame({
+            "unique_counterparties": np.bincount(pair_wallet, minlength=n_total)[:n_wallets],
+            "in_degree": np.bincount(edge_dst, minlength=n_total)[:n_wallets],
+            "out_degree": np.bincount(edge_src, minlength=n_total)[:n_wallets],
+        }, index=soa["wallet_ids"][:n_wallets])
+        
+        # Local clustering coefficient on the undirected counterparty graph
+        import networkx as nx
+        
+        G = nx.Graph()
+        G.add_nodes_from(range(n_wallets))
+        G.add_edges_from(
+            (u, v) for u, v in zip(edge_src.tolist(), edge_dst.tolist()) if u != v
+        )
+        clustering = nx.clustering(G, nodes=range(n_wallets))
+        metrics["clustering"] = [float(clustering[wallet]) for wallet in range(n_wallets)]
+        
+        return metrics
+    
     def _calculate_activity_score(
         self,
-        tx_metrics: Dict[str, Any],
-        network_metrics: Dict[str, Any]
-    ) -> float:
-        """Calculate overall activity score for a wallet."""
+        tx_metrics: pd.DataFrame,
+        network_metrics: pd.DataFrame
+    ) -> pd.Series:
+        """Calculate overall activity score for each wallet."""
         # Weighted combination of metrics
         score = (
             np.log1p(tx_metrics["total"]) * 0.3 +
@@ -387,13 +516,13 @@ class WalletAnalyzer:
             np.log1p(tx_metrics["days_active"]) * 0.2
         )
         
-        return round(score, 2)
+        return score.round(2)
     
     def _calculate_influence_score(
         self,
-        tx_metrics: Dict[str, Any],
-        network_metrics: Dict[str, Any]
-    ) -> float:
+        tx_metrics: pd.DataFrame,
+        network_metrics: pd.DataFrame
+    ) -> pd.Series:
         """Calculate influence score based on network position."""
         score = (
             network_metrics["unique_counterparties"] * 0.4 +
@@ -401,23 +530,4 @@ class WalletAnalyzer:
             network_metrics["clustering"] * 100 * 0.3
         )
         
-        return round(score, 2)
-    
-    def _dfs_cluster(
-        self,
-        start: str,
-        connections: Dict[str, set],
-        visited: set
-    ) -> set:
-        """DFS to find connected cluster."""
-        cluster = set()
-        stack = [start]
-        
-        while stack:
-            node = stack.pop()
-            if node not in visited:
-                visited.add(node)
-                cluster.add(node)
-                stack.extend(connections[node] - visited)
-        
-        return cluster
+        return score.round(2)
@@ -4,14 +4,44 @@ Fixed version with correct depth logic for recursive partner loading
 """
 
 import asyncio
+import heapq
+import json
 import logging
-from typing import Dict, List, Optional, Any, Set, Tuple
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Any, Set, Tuple, Union
 from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 import aiohttp
-from stellar_sdk import AiohttpClient
-from stellar_sdk.server_async import ServerAsync
-from stellar_sdk.exceptions import NotFoundError, BadRequestError
-import time
+
+try:
+    import orjson
+except ImportError:  # Optional: faster decoding of large Horizon pages
+    orjson = None
+
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:  # Optional: C parser for Horizon timestamps
+    _parse_timestamp = datetime.fromisoformat  # Parses a trailing 'Z' since Python 3.11
+
+try:
+    import aiodns  # noqa: F401  - enables aiohttp's AsyncResolver
+except ImportError:  # Optional: non-blocking DNS for the aiohttp session
+    aiodns = None
+
+try:
+    import diskcache
+except ImportError:  # Optional: persistent second-level response cache
+    diskcache = None
+
+try:
+    import httpx
+    import h2  # noqa: F401  - required by httpx for http2=True
+except ImportError:  # Optional: HTTP/2 multiplexing to Horizon
+    httpx = None
 
 # Configure logging
 logging.basicConfig(
@@ -20,19 +50,112 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Required fields of Horizon records, extracted in one C-level call per record
+_PAYMENT_FIELDS = itemgetter("id", "type", "created_at", "transaction_hash")
+_TRANSACTION_FIELDS = itemgetter("id", "hash", "ledger", "created_at", "operation_count")
+
+
+class HorizonError(Exception):
+    """Non-retryable HTTP error returned by Horizon."""
+    
+    def __init__(self, status: int, url: str):
+        super().__init__(f"Horizon returned {status} for {url}")
+        self.status = status
+        self.url = url
+
+
+@dataclass(frozen=True, slots=True)
+class Payment:
+    """Compact payment record used while crawling (``from`` is a keyword, hence ``from_``)."""
+    
+    id: str
+    type: str
+    created_at: str
+    transaction_hash: str
+    from_: str
+    to: str
+    amount: float
+    asset_type: str
+    asset_code: str
+    asset_issuer: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the plain dict shape returned to callers."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "created_at": self.created_at,
+            "transaction_hash": self.transaction_hash,
+            "from": self.from_,
+            "to": self.to,
+            "amount": self.amount,
+            "asset_type": self.asset_type,
+            "asset_code": self.asset_code,
+            "asset_issuer": self.asset_issuer,
+        }
+
+
 class StellarClient:
     """Enhanced Stellar API client with recursive network fetching."""
     
-    def __init__(self, horizon_url: str = "https://horizon.stellar.org"):
-        """Initialize the Stellar client."""
-        self.horizon_url = horizon_url
-        self.client = None
-        self.server = None
+    # Horizon responses worth retrying (rate limited / transient server errors)
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    RETRY_BACKOFF = 0.5  # seconds, doubled on every attempt
+    
+    # Per-client response cache (shared by repeated and concurrent lookups)
+    CACHE_TTL = 300  # seconds
+    CACHE_MAX_ENTRIES = 10_000
+    
+    # Upper bound for one wallet's full payment history during a crawl
+    WALLET_FETCH_TIMEOUT = 300  # seconds
+    
+    # Operation types that move funds between two accounts
+    PAYMENT_TYPES = frozenset({"payment", "path_payment_strict_send", "path_payment_strict_receive"})
+    
+    def __init__(
+        self,
+        horizon_url: str = "https://horizon.stellar.org",
+        timeout: int = 30,
+        max_retries: int = 3,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_inflight_requests: int = 20,
+        cache_ttl: Optional[int] = None
+    ):
+        """
+        Initialize the Stellar client.
+        
+        Args:
+            horizon_url: Horizon base URL
+            timeout: Total request timeout in seconds
+            max_retries: Retries for rate-limited / transient failures
+            cache_dir: Directory for the persistent payment cache (disabled if None)
+            max_inflight_requests: Upper bound on concurrent HTTP requests to Horizon
+            cache_ttl: Seconds cached responses stay valid, in memory and on disk
+                (defaults to CACHE_TTL)
+        """
+        self.horizon_url = horizon_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache_ttl = self.CACHE_TTL if cache_ttl is None else cache_ttl
         self._session = None
+        self._http = None
         self.rate_limit_remaining = 3600
         self.rate_limit_reset = None
-        self._request_times = []
         self._max_requests_per_second = 10
+        self._tokens = float(self._max_requests_per_second)
+        self._tokens_updated = None
+        self._rate_lock = asyncio.Lock()
+        # Shared by every request of this client, however many wallets/assets/pages
+        # are being fetched concurrently
+        self._request_semaphore = asyncio.Semaphore(max_inflight_requests)
+        self._max_concurrent_fetches = 4
+        self._max_concurrent_wallet_fetches = 16
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._disk_cache = (
+            diskcache.Cache(str(cache_dir)) if cache_dir and diskcache is not None else None
+        )
+        self.cache_stats = {"hits": 0, "shared": 0, "disk_hits": 0, "misses": 0}
         self.data_completeness_info = {}
     
     async def __aenter__(self):
@@ -45,32 +168,194 @@ class StellarClient:
         await self.close()
     
     async def connect(self):
-        """Establish connection to Stellar network."""
-        self.client = AiohttpClient()
-        self.server = ServerAsync(horizon_url=self.horizon_url, client=self.client)
+        """
+        Open a pooled HTTP session to Horizon.
+        
+        Uses an HTTP/2 httpx client when httpx and h2 are installed, so concurrent
+        page requests are multiplexed over one connection; aiohttp otherwise.
+        """
+        if httpx is not None:
+            self._http = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=64),
+                timeout=self.timeout,
+                headers={"Accept": "application/json"}
+            )
+            return
+        
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=64,
+            resolver=aiohttp.AsyncResolver() if aiodns is not None else None,
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            keepalive_timeout=30
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Accept": "application/json"}
+        )
     
     async def close(self):
         """Close the connection."""
-        if self.client:
-            await self.client.close()
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+    
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        GET a Horizon resource, retrying rate-limited and transient failures.
+        
+        Args:
+            path: Resource path (e.g. "/accounts/G...") or absolute URL
+            params: Query parameters
+            
+        Returns:
+            Decoded JSON response
+            
+        Raises:
+            HorizonError: On non-retryable HTTP errors
+        """
+        url = path if path.startswith("http") else f"{self.horizon_url}{path}"
+        
+        # Open the shared session on first use when not used as a context manager
+        if self._http is None and self._session is None:
+            await self.connect()
+        
+        for attempt in range(self.max_retries + 1):
+            async with self._request_semaphore:
+                await self._rate_limit()
+                status, retry_after, body = await self._send(url, params)
+            
+            if status in self.RETRY_STATUSES and attempt < self.max_retries:
+                delay = (
+                    float(retry_after) if retry_after and retry_after.isdigit()
+                    else self.RETRY_BACKOFF * 2 ** attempt
+                )
+                logger.warning("Horizon returned %s for %s, retrying in %.1fs", status, url, delay)
+                await asyncio.sleep(delay)
+                continue
+            
+            if status >= 400:
+                raise HorizonError(status, url)
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body)
+    
+    async def _send(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Optional[str], bytes]:
+        """Perform a single GET and return (status, Retry-After header, raw body)."""
+        if self._http is not None:
+            response = await self._http.get(url, params=params)
+            return response.status_code, response.headers.get("Retry-After"), response.content
+        
+        async with self._session.get(url, params=params) as response:
+            return response.status, response.headers.get("Retry-After"), await response.read()
     
     async def _rate_limit(self):
-        """Simple rate limiting."""
-        now = time.time()
-        self._request_times = [t for t in self._request_times if now - t < 1]
+        """
+        Token-bucket rate limiting.
+        
+        Concurrent requests may burst up to the bucket capacity; after that each
+        caller reserves the next token and sleeps outside the lock until it refills.
+        """
+        rate = self._max_requests_per_second
         
-        if len(self._request_times) >= self._max_requests_per_second:
-            sleep_time = 1 - (now - self._request_times[0])
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
+        async with self._rate_lock:
+            now = asyncio.get_running_loop().time()
+            if self._tokens_updated is not None:
+                self._tokens = min(rate, self._tokens + (now - self._tokens_updated) * rate)
+            self._tokens_updated = now
+            self._tokens -= 1
+            delay = -self._tokens / rate if self._tokens < 0 else 0
         
-        self._request_times.append(now)
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    async def _cached(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        persist: bool = False
+    ) -> Any:
+        """
+        Return a cached result for key, or compute it with fetch().
+        
+        Entries expire after cache_ttl seconds and the least recently used ones are
+        evicted past CACHE_MAX_ENTRIES. Concurrent callers asking for the same key
+        share one in-flight request instead of each hitting Horizon. With persist=True
+        and a cache_dir configured, misses are also looked up in / written to the
+        on-disk cache, so results survive across clients and sessions.
+        """
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry is not None and now - entry[0] < self.cache_ttl:
+            self._cache.move_to_end(key)
+            self.cache_stats["hits"] += 1
+            return entry[1]
+        
+        pending = self._inflight.get(key)
+        while pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+                self.cache_stats["shared"] += 1
+                return value
+            except asyncio.CancelledError:
+                # Re-raise our own cancellation; if only the owning request was
+                # cancelled (e.g. it timed out), take over the fetch instead.
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            pending = self._inflight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = None
+            disk_key = None
+            if persist and self._disk_cache is not None:
+                # The on-disk cache may be shared by clients of different networks
+                disk_key = repr((self.horizon_url, key))
+                value = await asyncio.to_thread(self._disk_cache.get, disk_key)
+            if value is not None:
+                self.cache_stats["disk_hits"] += 1
+            else:
+                self.cache_stats["misses"] += 1
+                value = await fetch()
+                if disk_key is not None:
+                    await asyncio.to_thread(self._disk_cache.set, disk_key, value, expire=self.cache_ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters re-raise it themselves
+            raise
+        finally:
+            del self._inflight[key]
+        
+        future.set_result(value)
+        self._cache[key] = (now, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return value
     
     async def get_account_info(self, account_id: str) -> Dict[str, Any]:
         """Get account information."""
         try:
-            await self._rate_limit()
-            account = await self.server.accounts().account_id(account_id).call()
+            account = await self._cached(
+                ("account", account_id),
+                lambda: self._get_json(f"/accounts/{account_id}")
+            )
             return {
                 "id": account["id"],
                 "sequence": account["sequence"],
@@ -79,11 +364,14 @@ class StellarClient:
                 "flags": account["flags"],
                 "created_at": account.get("created_at"),
             }
-        except NotFoundError:
-            logger.warning(f"Account {account_id} not found")
+        except HorizonError as e:
+            if e.status == 404:
+                logger.warning("Account %s not found", account_id)
+            else:
+                logger.error("Error fetching account %s: %s", account_id, e)
             return None
         except Exception as e:
-            logger.error(f"Error fetching account {account_id}: {e}")
+            logger.error("Error fetching account %s: %s", account_id, e)
             return None
     
     async def get_account_payments_enhanced(
@@ -98,38 +386,40 @@ class StellarClient:
         payments = []
         
         try:
-            await self._rate_limit()
-            
-            builder = self.server.payments().for_account(account_id).limit(limit).order(order)
+            params = {"limit": limit, "order": order}
             
             if cursor:
-                builder = builder.cursor(cursor)
+                params["cursor"] = cursor
             
             if include_failed:
-                builder = builder.include_failed_transactions()
+                params["include_failed"] = "true"
             
-            response = await builder.call()
+            response = await self._get_json(f"/accounts/{account_id}/payments", params)
             
+            payment_types = self.PAYMENT_TYPES
             for record in response["_embedded"]["records"]:
-                if record["type"] in ["payment", "path_payment_strict_send", "path_payment_strict_receive"]:
-                    payment = {
-                        "id": record["id"],
-                        "type": record["type"],
-                        "created_at": record["created_at"],
-                        "transaction_hash": record["transaction_hash"],
-                        "from": record.get("from", record.get("source_account", "")),
-                        "to": record.get("to", ""),
-                        "amount": float(record.get("amount", 0)),
-                        "asset_type": record.get("asset_type", "native"),
-                        "asset_code": record.get("asset_code", "XLM"),
-                        "asset_issuer": record.get("asset_issuer", ""),
-                    }
-                    payments.append(payment)
+                record_id, op_type, created_raw, tx_hash = _PAYMENT_FIELDS(record)
+                if op_type not in payment_types:
+                    continue
+                
+                get = record.get
+                payments.append({
+                    "id": record_id,
+                    "type": op_type,
+                    "created_at": created_raw,
+                    "transaction_hash": tx_hash,
+                    "from": get("from") if "from" in record else get("source_account", ""),
+                    "to": get("to", ""),
+                    "amount": float(get("amount", 0)),
+                    "asset_type": get("asset_type", "native"),
+                    "asset_code": get("asset_code", "XLM"),
+                    "asset_issuer": get("asset_issuer", ""),
+                })
             
             return payments
             
         except Exception as e:
-            logger.error(f"Error fetching payments for {account_id}: {e}")
+            logger.error("Error fetching payments for %s: %s", account_id, e)
             return []
     
     async def get_all_payments_filtered(
@@ -140,9 +430,39 @@ class StellarClient:
         date_to: Optional[datetime] = None,
         max_pages: int = 50
     ) -> List[Dict[str, Any]]:
-        """Get ALL payments for account with filters, handling pagination automatically."""
+        """
+        Get ALL payments for account with filters, handling pagination automatically.
+        
+        Returns plain dicts; iter_all_payments_filtered yields Payment records.
+        """
         all_payments = []
-        cursor = None
+        async for page in self.iter_all_payments_filtered(
+            account_id,
+            asset_code=asset_code,
+            date_from=date_from,
+            date_to=date_to,
+            max_pages=max_pages
+        ):
+            all_payments.extend(payment.to_dict() for payment in page)
+        return all_payments
+    
+    async def iter_all_payments_filtered(
+        self,
+        account_id: str,
+        asset_code: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        max_pages: int = 50
+    ) -> AsyncIterator[List[Payment]]:
+        """
+        Yield filtered payments one Horizon page at a time.
+        
+        The generator itself holds only the current page and the next cursor.
+        The crawl still gathers each wallet's full history, since that list is
+        what the per-wallet cache stores.
+        """
+        total_payments = 0
+        hit_max_pages = False
         pages_fetched = 0
         
         # Convert date to datetime if needed for comparison
@@ -152,93 +472,127 @@ class StellarClient:
         if date_to and isinstance(date_to, date_type) and not isinstance(date_to, datetime):
             date_to = datetime.combine(date_to, datetime.max.time()).replace(tzinfo=timezone.utc)
         
-        logger.info(f"Fetching {asset_code or 'ALL'} payments for {account_id[:8]}...")
-        logger.info(f"🔍 [stellar_client.py] get_all_payments_filtered() вызван с MAX_PAGES={max_pages}")
-        if date_from:
-            logger.info(f"  Date from: {date_from}")
-        if date_to:
-            logger.info(f"  Date to: {date_to}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Fetching %s payments for %s...", asset_code or 'ALL', account_id[:8])
+            logger.debug("🔍 [stellar_client.py] iter_all_payments_filtered() вызван с MAX_PAGES=%s", max_pages)
+            if date_from:
+                logger.info("  Date from: %s", date_from)
+            if date_to:
+                logger.info("  Date to: %s", date_to)
         
-        while pages_fetched < max_pages:
-            try:
-                await self._rate_limit()
+        path = f"/accounts/{account_id}/payments"
+        next_page = asyncio.create_task(self._get_json(path, {"limit": 200, "order": "desc"}))
+        
+        try:
+            while pages_fetched < max_pages:
+                try:
+                    response = await next_page
+                    next_page = None
+                    records = response["_embedded"]["records"]
+                
+                    if not records:
+                        break
                 
-                builder = self.server.payments().for_account(account_id).limit(200).order("desc")
+                    # The next page starts after the last record's paging token; fall
+                    # back to the cursor of the next link if a record lacks one
+                    next_link = response["_links"].get("next")
+                    if next_link is None:
+                        cursor = None
+                    else:
+                        cursor = records[-1].get("paging_token") or parse_qs(
+                            urlsplit(next_link["href"]).query
+                        ).get("cursor", [None])[0]
                 
-                if cursor:
-                    builder = builder.cursor(cursor)
+                    # Records come newest first, so the last record bounds the page:
+                    # if it is already older than date_from every later page is too
+                    oldest = _parse_timestamp(records[-1]["created_at"]) if date_from or date_to else None
                 
-                response = await builder.call()
-                records = response["_embedded"]["records"]
+                    # Prefetch the following page while this one is parsed and consumed
+                    if cursor and pages_fetched + 1 < max_pages and not (date_from and oldest < date_from):
+                        next_page = asyncio.create_task(
+                            self._get_json(path, {"limit": 200, "order": "desc", "cursor": cursor})
+                        )
                 
-                if not records:
-                    break
+                    # A page whose oldest record is still newer than date_to holds
+                    # nothing in range, so skip parsing it
+                    page_in_range = not (date_to and oldest > date_to)
                 
-                batch_payments = []
-                for record in records:
-                    if record["type"] not in ["payment", "path_payment_strict_send", "path_payment_strict_receive"]:
-                        continue
+                    batch_payments = []
+                    reached_date_limit = False
+                    for record in records if page_in_range else ():
+                        record_id, op_type, created_raw, tx_hash = _PAYMENT_FIELDS(record)
+                        if op_type not in self.PAYMENT_TYPES:
+                            continue
                     
-                    created_at = datetime.fromisoformat(record["created_at"].replace('Z', '+00:00'))
+                        created_at = _parse_timestamp(created_raw)
                     
-                    if date_to and created_at > date_to:
-                        continue
-                    if date_from and created_at < date_from:
-                        logger.info(f"  Reached date limit at {created_at}, stopping pagination")
-                        pages_fetched = max_pages
-                        break
+                        if date_to and created_at > date_to:
+                            continue
+                        if date_from and created_at < date_from:
+                            logger.info("  Reached date limit at %s, stopping pagination", created_at)
+                            reached_date_limit = True
+                            break
                     
-                    payment_asset = record.get("asset_code", "XLM")
-                    if asset_code and payment_asset != asset_code:
-                        continue
+                        get = record.get
+                        payment_asset = get("asset_code", "XLM")
+                        if asset_code and payment_asset != asset_code:
+                            continue
                     
-                    payment = {
-                        "id": record["id"],
-                        "type": record["type"],
-                        "created_at": record["created_at"],
-                        "transaction_hash": record["transaction_hash"],
-                        "from": record.get("from", record.get("source_account", "")),
-                        "to": record.get("to", ""),
-                        "amount": float(record.get("amount", 0)),
-                        "asset_type": record.get("asset_type", "native"),
-                        "asset_code": payment_asset,
-                        "asset_issuer": record.get("asset_issuer", ""),
-                    }
-                    batch_payments.append(payment)
+                        payment = Payment(
+                            id=record_id,
+                            type=op_type,
+                            created_at=created_raw,
+                            transaction_hash=tx_hash,
+                            from_=get("from") if "from" in record else get("source_account", ""),
+                            to=get("to", ""),
+                            amount=float(get("amount", 0)),
+                            asset_type=get("asset_type", "native"),
+                            asset_code=payment_asset,
+                            asset_issuer=get("asset_issuer", ""),
+                        )
+                        batch_payments.append(payment)
                 
-                all_payments.extend(batch_payments)
-                pages_fetched += 1
+                    total_payments += len(batch_payments)
+                    pages_fetched += 1
                 
-                if pages_fetched >= max_pages:
-                    logger.info(f"  Reached max pages limit ({max_pages})")
-                    self.last_fetch_info = {
-                        'hit_max_pages': True,
-                        'pages_fetched': pages_fetched,
-                        'total_payments': len(all_payments)
-                    }
-                    break
+                    if batch_payments:
+                        yield batch_payments
                 
-                if "next" in response["_links"]:
-                    next_href = response["_links"]["next"]["href"]
-                    cursor_start = next_href.find("cursor=") + 7
-                    cursor_end = next_href.find("&", cursor_start)
-                    cursor = next_href[cursor_start:] if cursor_end == -1 else next_href[cursor_start:cursor_end]
-                else:
-                    break
+                    # Every later page is older still
+                    if reached_date_limit:
+                        break
                 
-                if pages_fetched % 10 == 0:
-                    logger.info(f"  Fetched {pages_fetched} pages, {len(all_payments)} payments so far...")
+                    if pages_fetched >= max_pages:
+                        hit_max_pages = True
+                        logger.info("  Reached max pages limit (%s)", max_pages)
+                        self.last_fetch_info = {
+                            'hit_max_pages': True,
+                            'pages_fetched': pages_fetched,
+                            'total_payments': total_payments
+                        }
+                        break
                 
-            except Exception as e:
-                logger.error(f"Error fetching page {pages_fetched + 1}: {e}")
-                break
-        
-        logger.info(f"  Total: {len(all_payments)} {asset_code or 'ALL'} payments from {pages_fetched} pages")
+                    if next_page is None:
+                        break
+                
+                    if pages_fetched % 10 == 0:
+                        logger.debug("  Fetched %s pages, %s payments so far...", pages_fetched, total_payments)
+                
+                except Exception as e:
+                    logger.error("Error fetching page %s: %s", pages_fetched + 1, e)
+                    break
+        finally:
+            # Drop a prefetched page that is no longer needed, also when the
+            # caller stops iterating early (aclose(), break, exception at yield)
+            if next_page is not None:
+                next_page.cancel()
+                if next_page.done() and not next_page.cancelled():
+                    next_page.exception()
         
-        if pages_fetched >= max_pages:
-            logger.warning(f"  ⚠️ Hit page limit! May be missing older transactions")
+        logger.info("  Total: %s %s payments from %s pages", total_payments, asset_code or 'ALL', pages_fetched)
         
-        return all_payments
+        if hit_max_pages:
+            logger.warning("  ⚠️ Hit page limit! May be missing older transactions")
     
     async def get_account_transactions(
         self, 
@@ -250,22 +604,21 @@ class StellarClient:
         transactions = []
         
         try:
-            await self._rate_limit()
-            
-            builder = self.server.transactions().for_account(account_id).limit(limit)
+            params = {"limit": limit}
             if include_failed:
-                builder = builder.include_failed_transactions()
+                params["include_failed"] = "true"
             
-            response = await builder.call()
+            response = await self._get_json(f"/accounts/{account_id}/transactions", params)
             
             for tx in response["_embedded"]["records"]:
+                tx_id, tx_hash, ledger, created_at, operation_count = _TRANSACTION_FIELDS(tx)
                 transactions.append({
-                    "id": tx["id"],
-                    "hash": tx["hash"],
-                    "ledger": tx["ledger"],
-                    "created_at": tx["created_at"],
+                    "id": tx_id,
+                    "hash": tx_hash,
+                    "ledger": ledger,
+                    "created_at": created_at,
                     "fee_charged": tx.get("fee_charged", 0),
-                    "operation_count": tx["operation_count"],
+                    "operation_count": operation_count,
                     "memo_type": tx.get("memo_type"),
                     "memo": tx.get("memo"),
                     "successful": tx.get("successful", True),
@@ -274,16 +627,20 @@ class StellarClient:
             return transactions
             
         except Exception as e:
-            logger.error(f"Error fetching transactions for {account_id}: {e}")
+            logger.error("Error fetching transactions for %s: %s", account_id, e)
             return []
     
     async def get_transaction_details(self, tx_hash: str) -> Dict[str, Any]:
         """Get detailed transaction information."""
+        async def fetch():
+            return await asyncio.gather(
+                self._get_json(f"/transactions/{tx_hash}"),
+                self._get_json(f"/transactions/{tx_hash}/operations")
+            )
+        
         try:
-            await self._rate_limit()
-            
-            tx = await self.server.transactions().transaction(tx_hash).call()
-            ops = await self.server.operations().for_transaction(tx_hash).call()
+            # Committed transactions never change, so they may also be kept on disk
+            tx, ops = await self._cached(("transaction", tx_hash), fetch, persist=True)
             
             operations = []
             for op in ops["_embedded"]["records"]:
@@ -309,7 +666,7 @@ class StellarClient:
             }
             
         except Exception as e:
-            logger.error(f"Error fetching transaction {tx_hash}: {e}")
+            logger.error("Error fetching transaction %s: %s", tx_hash, e)
             return None
     
     async def fetch_wallet_network(
@@ -325,7 +682,8 @@ class StellarClient:
         direction_filter: Optional[str] = None,
         min_amount: Optional[float] = None,
         max_amount: Optional[float] = None,
-        max_pages: int = 50
+        max_pages: int = 50,
+        max_transactions: Optional[int] = 100_000
     ) -> Dict[str, Any]:
         """
         Fetch network of wallets connected to a starting wallet.
@@ -343,18 +701,34 @@ class StellarClient:
             min_amount: Minimum transaction amount
             max_amount: Maximum transaction amount
             max_pages: Maximum pages to fetch per wallet (200 tx per page)
-            direction_filter: Filter by "Sent" or "Received" from start wallet
-            min_amount: Minimum transaction amount
-            max_amount: Maximum transaction amount
+            max_transactions: Keep only this many largest matching payments (None = unbounded);
+                wallet activity still counts every payment
             
         Returns:
             Network data with wallets and transactions
         """
+        # Фильтруем транзакции прямо во время обхода
+        # КРИТИЧНО: Оставляем ТОЛЬКО транзакции стартового кошелька!
+        # The predicate is specialized once for the active filters; unset amount
+        # bounds become infinities so every row is a single chained comparison
+        low = min_amount or float("-inf")
+        high = max_amount or float("inf")
+        
+        if direction_filter == "Sent":
+            def keep(tx: Payment) -> bool:
+                return tx.from_ == start_wallet and low <= tx.amount <= high
+        elif direction_filter == "Received":
+            def keep(tx: Payment) -> bool:
+                return tx.to == start_wallet and low <= tx.amount <= high
+        else:
+            def keep(tx: Payment) -> bool:
+                return (tx.from_ == start_wallet or tx.to == start_wallet) and low <= tx.amount <= high
+        
         wallet_activity = {}
         transactions = []
         visited = set()
         
-        await self._collect_wallet_activity(
+        discovered = await self._collect_wallet_activity(
             start_wallet, 
             wallet_activity, 
             transactions, 
@@ -364,70 +738,48 @@ class StellarClient:
             asset_filter=asset_filter,
             date_from=date_from,
             date_to=date_to,
-            max_pages=max_pages
+            max_pages=max_pages,
+            max_transactions=max_transactions,
+            keep=keep
         )
         
-        logger.info(f"\n{'='*50}")
-        logger.info(f"TRANSACTION FILTERING")
-        logger.info(f"{'='*50}")
-        logger.info(f"Total collected transactions: {len(transactions)}")
-        logger.info(f"Total collected wallets: {len(wallet_activity)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", "=" * 50)
+            logger.info("TRANSACTION FILTERING")
+            logger.info("%s", "=" * 50)
+            logger.info("Total collected transactions: %s", discovered)
+            logger.info("Total collected wallets: %s", len(wallet_activity))
+            logger.info(
+                "Cache: %s hits, %s shared in-flight, %s disk hits, %s misses",
+                self.cache_stats["hits"], self.cache_stats["shared"],
+                self.cache_stats["disk_hits"], self.cache_stats["misses"]
+            )
         
         # НОВАЯ ЛОГИКА: Приоритет прямым связям стартового кошелька
-        direct_partners = set()
-        start_tx_count = 0
-        
-        # Найдём всех прямых партнёров стартового кошелька
-        for tx in transactions:
-            if tx['from'] == start_wallet:
-                direct_partners.add(tx['to'])
-                start_tx_count += 1
-            elif tx['to'] == start_wallet:
-                direct_partners.add(tx['from'])
-                start_tx_count += 1
-        
-        logger.info(f"Start wallet has {start_tx_count} transactions with {len(direct_partners)} unique partners")
-        logger.info(f"Current wallet_activity before adding partners: {list(wallet_activity.keys())}")
-        
-        # КРИТИЧНО для depth=0: Добавляем партнёров в wallet_activity!
-        partners_added = 0
-        for partner in direct_partners:
-            if partner not in wallet_activity:
-                # Подсчитаем статистику по транзакциям партнёра
-                partner_tx_count = 0
-                partner_volume = 0
-                partner_counterparties = set()
-                
-                for tx in transactions:
-                    if tx['from'] == partner or tx['to'] == partner:
-                        partner_tx_count += 1
-                        partner_volume += tx.get('amount', 0)
-                        if tx['from'] == partner:
-                            partner_counterparties.add(tx['to'])
-                        if tx['to'] == partner:
-                            partner_counterparties.add(tx['from'])
-                
-                wallet_activity[partner] = {
-                    "transaction_count": partner_tx_count,
-                    "total_volume": partner_volume,
-                    "counterparties": partner_counterparties,
-                    "has_direct_tx_with_start": True
-                }
-                partners_added += 1
-                logger.info(f"  Added partner {partner[:8]}... to wallet_activity ({partner_tx_count} txs)")
+        # The crawl already aggregated every wallet it saw (including depth=0
+        # partners), so direct partners come straight from the start wallet's
+        # counterparties instead of another pass over the transactions
+        start_activity = wallet_activity.get(start_wallet)
+        if start_activity is not None:
+            direct_partners = set(start_activity["counterparties"])
+            start_tx_count = start_activity["transaction_count"]
+        else:
+            direct_partners = set()
+            start_tx_count = 0
         
-        logger.info(f"✅ Added {partners_added} partners. Total wallets now: {len(wallet_activity)}")
+        logger.info("Start wallet has %s transactions with %s unique partners", start_tx_count, len(direct_partners))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Current wallet_activity before adding partners: %s", list(wallet_activity.keys()))
         
         # Помечаем прямых партнёров
-        for wallet_id in direct_partners:
-            if wallet_id in wallet_activity:
-                wallet_activity[wallet_id]['has_direct_tx_with_start'] = True
-                
+        for partner in direct_partners:
+            wallet_activity[partner]["has_direct_tx_with_start"] = True
+        
         # Отбираем топ кошельки с ПРИОРИТЕТОМ прямых связей
         if strategy == "most_active":
             # СНАЧАЛА берём ВСЕ прямые связи
             top_wallets = list(direct_partners)
-            logger.info(f"Including ALL {len(direct_partners)} direct partners first")
+            logger.info("Including ALL %s direct partners first", len(direct_partners))
             
             # ПОТОМ добавляем самые активные из остальных
             if len(top_wallets) < max_wallets:
@@ -439,7 +791,7 @@ class StellarClient:
                 for wallet_id, _ in other_wallets[:remaining_slots]:
                     top_wallets.append(wallet_id)
                     
-                logger.info(f"Added {min(remaining_slots, len(other_wallets))} additional active wallets")
+                logger.info("Added %s additional active wallets", min(remaining_slots, len(other_wallets)))
         else:
             # breadth_first - но всё равно включаем прямые связи первыми
             top_wallets = list(direct_partners)[:max_wallets]
@@ -450,36 +802,26 @@ class StellarClient:
                         if len(top_wallets) >= max_wallets:
                             break
         
-        logger.info(f"Top wallets selected: {len(top_wallets)}")
+        logger.info("Top wallets selected: %s", len(top_wallets))
         
         # Проверяем что GDT7...GULJ включён (если есть)
         gulj_wallet = None
         for wallet in top_wallets:
             if wallet.startswith("GDT7") and "GULJ" in wallet:
                 gulj_wallet = wallet
-                logger.info(f"✅ CONFIRMED: {gulj_wallet[:8]}...{gulj_wallet[-4:]} is in top wallets!")
+                logger.info("✅ CONFIRMED: %s...%s is in top wallets!", gulj_wallet[:8], gulj_wallet[-4:])
                 break
         
-        # Фильтруем транзакции
+        # Collected rows already passed keep(); convert them and collect the
+        # wallets in the result in the same pass
         filtered_transactions = []
+        unique_wallets = set()
         for tx in transactions:
-            # КРИТИЧНО: Оставляем ТОЛЬКО транзакции стартового кошелька!
-            if tx["from"] == start_wallet or tx["to"] == start_wallet:
-                # Apply additional filters
-                if direction_filter:
-                    if direction_filter == "Sent" and tx["from"] != start_wallet:
-                        continue
-                    if direction_filter == "Received" and tx["to"] != start_wallet:
-                        continue
-                
-                if min_amount and tx["amount"] < min_amount:
-                    continue
-                if max_amount and tx["amount"] > max_amount:
-                    continue
-                
-                filtered_transactions.append(tx)
+            filtered_transactions.append(tx.to_dict())
+            unique_wallets.add(tx.from_)
+            unique_wallets.add(tx.to)
         
-        logger.info(f"Filtered transactions: {len(transactions)} -> {len(filtered_transactions)}")
+        logger.info("Filtered transactions: %s -> %s", discovered, len(filtered_transactions))
         
         # Get details for top wallets
         wallet_details = {}
@@ -502,18 +844,12 @@ class StellarClient:
                 "has_direct_tx_with_start": details.get('has_direct_tx_with_start', False)
             }
         
-        # Calculate unique wallets
-        unique_wallets = set()
-        for tx in filtered_transactions:
-            unique_wallets.add(tx["from"])
-            unique_wallets.add(tx["to"])
-        
-        logger.info(f"Total unique wallets in filtered transactions: {len(unique_wallets)}")
+        logger.info("Total unique wallets in filtered transactions: %s", len(unique_wallets))
         
         # Add filtering stats
         filtering_stats = {
             "total_discovered_wallets": len(wallet_activity),
-            "total_discovered_transactions": len(transactions),
+            "total_discovered_transactions": discovered,
             "direct_partners_count": len(direct_partners),
             "top_wallets_selected": len(top_wallets),
             "filtered_transactions": len(filtered_transactions),
@@ -542,7 +878,7 @@ class StellarClient:
         self,
         wallet_id: str,
         wallet_activity: Dict[str, Any],
-        transactions: List[Dict[str, Any]],
+        transactions: List[Payment],
         visited: set,
         max_depth: int,
         max_collect: int,
@@ -550,125 +886,245 @@ class StellarClient:
         asset_filter: Optional[List[str]] = None,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-        max_pages: int = 50
-    ):
+        max_pages: int = 50,
+        max_transactions: Optional[int] = None,
+        keep: Optional[Callable[[Payment], bool]] = None
+    ) -> int:
         """
-        Collect wallet activity data recursively WITH FILTERS and PAGINATION.
+        Collect wallet activity level by level WITH FILTERS and PAGINATION.
         
         Gets ALL transactions for the specified period and asset!
+        Wallets at the same depth are fetched concurrently (bounded by a semaphore).
+        Payments failing keep() still count towards wallet activity but are not
+        stored. With max_transactions set, only the largest stored payments are
+        kept (a bounded min-heap), in the order they were found.
+        
+        Returns:
+            Number of distinct transactions discovered
         """
-        # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: изменено >= на >
-        # EGO-GRAPH MODE: depth=0 загружает ТОЛЬКО стартовый кошелёк
-        if current_depth > max_depth or len(wallet_activity) >= max_collect:
-            return
+        semaphore = asyncio.Semaphore(self._max_concurrent_wallet_fetches)
         
-        if wallet_id in visited:
-            return
+        # Wallet ids are interned to integer indexes: the frontier, visited set and
+        # activity (struct of arrays) work on ints and are materialized into
+        # wallet_activity / visited once the crawl is done
+        index: Dict[str, int] = {}
+        wallet_ids: List[str] = []
+        tx_count: List[int] = []
+        volume: List[float] = []
+        counterparties: List[Set[int]] = []
         
-        visited.add(wallet_id)
+        def add_wallet(w: str) -> int:
+            i = index[w] = len(wallet_ids)
+            wallet_ids.append(w)
+            tx_count.append(0)
+            volume.append(0)
+            counterparties.append(set())
+            return i
         
-        # Initialize wallet activity tracking
-        if wallet_id not in wallet_activity:
-            wallet_activity[wallet_id] = {
-                "transaction_count": 0,
-                "total_volume": 0,
-                "counterparties": set()
-            }
+        for w, data in wallet_activity.items():
+            i = add_wallet(w)
+            tx_count[i] = data["transaction_count"]
+            volume[i] = data["total_volume"]
         
-        # Fetch ALL payments with filters and pagination
-        try:
-            # Determine which asset to filter by
-            # If multiple assets in filter, fetch for each
-            assets_to_fetch = asset_filter if asset_filter and "All" not in asset_filter else [None]
-            
-            logger.info(f"===== Collecting activity for {wallet_id[:8]} =====")
-            logger.info(f"Asset filter received: {asset_filter}")
-            logger.info(f"Assets to fetch: {assets_to_fetch}")
-            logger.info(f"Date range: {date_from} to {date_to}")
-            logger.info(f"Current depth: {current_depth}/{max_depth}")
-            
-            all_payments = []
-            for asset_code in assets_to_fetch:
-                logger.info(f"Fetching {asset_code or 'ALL'} payments for {wallet_id[:8]}...")
-                
-                payments = await self.get_all_payments_filtered(
-                    account_id=wallet_id,
-                    asset_code=asset_code,
-                    date_from=date_from,
-                    date_to=date_to,
-                    max_pages=max_pages
-                )
-                
-                logger.info(f"Got {len(payments)} payments for asset {asset_code or 'ALL'}")
-                all_payments.extend(payments)
-                
-                # Сохраняем информацию о полноте для этого кошелька
-                if hasattr(self, 'last_fetch_info') and self.last_fetch_info:
-                    if wallet_id not in self.data_completeness_info:
-                        self.data_completeness_info[wallet_id] = []
-                    self.data_completeness_info[wallet_id].append({
-                        'asset': asset_code or 'ALL',
-                        **self.last_fetch_info
-                    })
-                    self.last_fetch_info = None
-            
-            logger.info(f"Got {len(all_payments)} payments total for {wallet_id[:8]}")
-            
-            # Process payments
-            tx_added = 0
-            for payment in all_payments:
-                from_wallet = payment["from"]
-                to_wallet = payment["to"]
-                amount = payment["amount"]
-                
-                # Skip if neither wallet is in our target set
-                if from_wallet == wallet_id or to_wallet == wallet_id:
-                    # Add transaction to global list (avoid duplicates)
-                    tx_key = f"{payment['transaction_hash']}_{from_wallet}_{to_wallet}"
-                    if not any(tx.get('transaction_hash') == payment['transaction_hash'] and 
-                              tx.get('from') == from_wallet and tx.get('to') == to_wallet 
-                              for tx in transactions):
-                        transactions.append(payment)
-                        tx_added += 1
-                    
-                    # Update wallet activity
-                    for w in [from_wallet, to_wallet]:
-                        if w not in wallet_activity:
-                            wallet_activity[w] = {
-                                "transaction_count": 0,
-                                "total_volume": 0,
-                                "counterparties": set()
-                            }
-                        
-                        wallet_activity[w]["transaction_count"] += 1
-                        wallet_activity[w]["total_volume"] += amount
-                    
-                    # Track counterparties
-                    wallet_activity[from_wallet]["counterparties"].add(to_wallet)
-                    wallet_activity[to_wallet]["counterparties"].add(from_wallet)
-                    
-                    # Explore connected wallets (only if depth allows)
-                    if current_depth < max_depth:
-                        for next_wallet in [from_wallet, to_wallet]:
-                            if next_wallet != wallet_id and next_wallet not in visited and len(wallet_activity) < max_collect:
-                                await self._collect_wallet_activity(
-                                    next_wallet,
-                                    wallet_activity,
-                                    transactions,
-                                    visited,
-                                    max_depth,
-                                    max_collect,
-                                    current_depth + 1,
+        def intern(w: str) -> int:
+            i = index.get(w)
+            return add_wallet(w) if i is None else i
+        
+        seen: Set[int] = {intern(w) for w in visited}
+        frontier = [intern(wallet_id)]
+        
+        # A payment between two crawled wallets shows up in both histories;
+        # count it once. Transactions keep their (hash, from, to) dedupe key.
+        seen_payment_ids: Set[str] = set()
+        seen_tx_keys: Set[Tuple[str, str, str]] = {
+            (tx.transaction_hash, tx.from_, tx.to) for tx in transactions
+        }
+        # (amount, discovery order, payment); turned into a min-heap once full
+        kept: List[Tuple[float, int, Payment]] = []
+        dropped = 0
+        
+        # EGO-GRAPH MODE: depth=0 загружает ТОЛЬКО стартовый кошелёк
+        while frontier and current_depth <= max_depth:
+            level = [i for i in dict.fromkeys(frontier) if i not in seen]
+            level = level[:max(0, max_collect - len(seen))]
+            if not level:
+                break
+            
+            seen.update(level)
+            
+            logger.info("Depth %s/%s: fetching %s wallets", current_depth, max_depth, len(level))
+            
+            async def fetch(w: str) -> Union[List[Payment], Exception]:
+                # Failures are returned, not raised, so one wallet cannot abort the level
+                try:
+                    async with semaphore:
+                        payments, completeness = await asyncio.wait_for(
+                            self._cached(
+                                ("payments", w, tuple(asset_filter or ()), date_from, date_to, max_pages),
+                                lambda: self._fetch_wallet_payments(
+                                    w,
                                     asset_filter=asset_filter,
                                     date_from=date_from,
                                     date_to=date_to,
                                     max_pages=max_pages
-                                )
+                                ),
+                                persist=True
+                            ),
+                            timeout=self.WALLET_FETCH_TIMEOUT
+                        )
+                except Exception as e:
+                    return e
+                if completeness:
+                    self.data_completeness_info.setdefault(w, []).extend(completeness)
+                return payments
             
-            logger.info(f"✅ Added {tx_added} transactions from {wallet_id[:8]} to global list")
+            # TaskGroup cancels every in-flight wallet fetch if the crawl itself is
+            # cancelled; a single-wallet level (always the case at depth=0) is awaited inline
+            if len(level) == 1:
+                results = [await fetch(wallet_ids[level[0]])]
+            else:
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(fetch(wallet_ids[i])) for i in level]
+                results = [task.result() for task in tasks]
             
-        except Exception as e:
-            logger.warning(f"Error collecting activity for {wallet_id}: {e}")
+            next_frontier = []
+            for wi, all_payments in zip(level, results):
+                w = wallet_ids[wi]
+                if isinstance(all_payments, Exception):
+                    logger.warning("Error collecting activity for %s: %s", w, all_payments)
+                    continue
+                
+                # Process payments
+                tx_added = 0
+                for payment in all_payments:
+                    from_wallet = payment.from_
+                    to_wallet = payment.to
+                    amount = payment.amount
+                    
+                    # Skip if neither wallet is in our target set
+                    if from_wallet == w or to_wallet == w:
+                        if payment.id in seen_payment_ids:
+                            continue
+                        seen_payment_ids.add(payment.id)
+                        
+                        # Add transaction to global list (avoid duplicates)
+                        tx_key = (payment.transaction_hash, from_wallet, to_wallet)
+                        if tx_key not in seen_tx_keys:
+                            seen_tx_keys.add(tx_key)
+                            if keep is None or keep(payment):
+                                entry = (amount, len(seen_tx_keys), payment)
+                                if max_transactions is None or len(kept) < max_transactions:
+                                    kept.append(entry)
+                                    if len(kept) == max_transactions:
+                                        heapq.heapify(kept)
+                                else:
+                                    heapq.heappushpop(kept, entry)
+                                    dropped += 1
+                                tx_added += 1
+                        
+                        # Update wallet activity
+                        fi = intern(from_wallet)
+                        ti = intern(to_wallet)
+                        
+                        tx_count[fi] += 1
+                        tx_count[ti] += 1
+                        volume[fi] += amount
+                        volume[ti] += amount
+                        
+                        # Track counterparties
+                        counterparties[fi].add(ti)
+                        counterparties[ti].add(fi)
+                        
+                        # Queue connected wallets for the next level (only if depth allows)
+                        if current_depth < max_depth:
+                            next_frontier.append(ti if fi == wi else fi)
+                
+                logger.debug("✅ Added %s transactions from %s to global list", tx_added, w[:8])
+            
+            frontier = next_frontier
+            current_depth += 1
+        
+        if dropped:
+            logger.info("Transaction cap %s reached: dropped %s smaller payments", max_transactions, dropped)
+        # A full cap turned kept into a heap; restore discovery order
+        if max_transactions is not None and len(kept) >= max_transactions:
+            kept.sort(key=itemgetter(1))
+        transactions.extend(payment for _, _, payment in kept)
+        
+        visited.update(wallet_ids[i] for i in seen)
+        for w, i in index.items():
+            entry = wallet_activity.setdefault(w, {})
+            entry["transaction_count"] = tx_count[i]
+            entry["total_volume"] = volume[i]
+            entry["counterparties"] = entry.get("counterparties", set()).union(
+                wallet_ids[j] for j in counterparties[i]
+            )
+        
+        return len(seen_tx_keys)
+    
+    async def _fetch_wallet_payments(
+        self,
+        wallet_id: str,
+        asset_filter: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        max_pages: int = 50
+    ) -> Tuple[List[Payment], List[Dict[str, Any]]]:
+        """
+        Fetch ALL payments of one wallet for every requested asset.
+        
+        Returns:
+            Payments and per-asset data completeness entries
+        """
+        # Determine which asset to filter by
+        # If multiple assets in filter, fetch for each
+        assets_to_fetch = asset_filter if asset_filter and "All" not in asset_filter else [None]
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("===== Collecting activity for %s =====", wallet_id[:8])
+            logger.debug("Asset filter received: %s", asset_filter)
+            logger.debug("Assets to fetch: %s", assets_to_fetch)
+            logger.debug("Date range: %s to %s", date_from, date_to)
+        
+        async def fetch_asset(asset_code: Optional[str]) -> Tuple[List[Payment], Optional[Dict[str, Any]]]:
+            payments = []
+            async for page in self.iter_all_payments_filtered(
+                wallet_id,
+                asset_code=asset_code,
+                date_from=date_from,
+                date_to=date_to,
+                max_pages=max_pages
+            ):
+                payments.extend(page)
+            
+            logger.info("Got %s payments for asset %s", len(payments), asset_code or 'ALL')
+            
+            # Сохраняем информацию о полноте для этого кошелька
+            # (read right after pagination ends, before any other fetch can overwrite it)
+            info = None
+            if hasattr(self, 'last_fetch_info') and self.last_fetch_info:
+                info = {'asset': asset_code or 'ALL', **self.last_fetch_info}
+                self.last_fetch_info = None
+            return payments, info
+        
+        # Each asset is paginated independently, so fetch them concurrently;
+        # the common single-asset case is awaited inline without a task
+        if len(assets_to_fetch) == 1:
+            results = [await fetch_asset(assets_to_fetch[0])]
+        else:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(fetch_asset(asset_code)) for asset_code in assets_to_fetch]
+            results = [task.result() for task in tasks]
+        
+        # A single asset's list is returned as is rather than copied
+        if len(results) == 1:
+            all_payments = results[0][0]
+        else:
+            all_payments = [payment for payments, _ in results for payment in payments]
+        completeness = [info for _, info in results if info]
+        
+        logger.info("Got %s payments total for %s", len(all_payments), wallet_id[:8])
+        return all_payments, completeness
     
     async def fetch_top_active_wallets(
         self,
@@ -685,7 +1141,7 @@ class StellarClient:
         Returns:
             Network data with top active wallets
         """
-        logger.info(f"Fetching top {limit} active wallets...")
+        logger.info("Fetching top %s active wallets...", limit)
         
         seed_wallets = [
             "GAAZI4TCR3TY5OJHCTJC2A4QSY6CJWJH5IAJTGKIN2ER7LBNVKOCCWN7",
@@ -694,13 +1150,26 @@ class StellarClient:
         wallet_activity = {}
         all_transactions = []
         
-        for seed in seed_wallets:
-            data = await self.fetch_wallet_network(
-                seed,
-                depth=3,
-                max_wallets=limit,
-                strategy="most_active"
-            )
+        semaphore = asyncio.Semaphore(self._max_concurrent_fetches)
+        
+        async def fetch_seed(seed: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.fetch_wallet_network(
+                    seed,
+                    depth=3,
+                    max_wallets=limit,
+                    strategy="most_active"
+                )
+        
+        results = await asyncio.gather(
+            *(fetch_seed(seed) for seed in seed_wallets),
+            return_exceptions=True
+        )
+        
+        for seed, data in zip(seed_wallets, results):
+            if isinstance(data, Exception):
+                logger.warning("Error fetching network for seed %s: %s", seed[:8], data)
+                continue
             
             for wallet_id, details in data["wallets"].items():
                 if wallet_id not in wallet_activity:
@@ -708,13 +1177,11 @@ class StellarClient:
             
             all_transactions.extend(data["transactions"])
         
-        sorted_wallets = sorted(
+        top_wallets = dict(heapq.nlargest(
+            limit,
             wallet_activity.items(),
-            key=lambda x: x[1].get("transaction_count", 0),
-            reverse=True
-        )
-        
-        top_wallets = dict(sorted_wallets[:limit])
+            key=lambda x: x[1].get("transaction_count", 0)
+        ))
         
         return {
             "wallets": top_wallets,
@@ -723,6 +1190,6 @@ class StellarClient:
                 "total_wallets": len(top_wallets),
                 "total_transactions": len(all_transactions),
                 "sampling_seeds": len(seed_wallets),
-                "start_wallet": start_wallet,  # КРИТИЧНО: стартовый кошелёк
+                "start_wallet": seed_wallets[0],  # КРИТИЧНО: стартовый кошелёк
             }
         }
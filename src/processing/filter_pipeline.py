@@ -3,6 +3,11 @@ from typing import List, Dict, Any, Callable, Optional
 from datetime import datetime, date
 import logging
 
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:  # Optional: C parser for ISO-8601 timestamps
+    _parse_timestamp = datetime.fromisoformat  # Parses a trailing 'Z' since Python 3.11
+
 logger = logging.getLogger(__name__)
 
 
@@ -76,7 +81,7 @@ class FilterPipeline:
                     continue
                 
                 try:
-                    tx_date = datetime.fromisoformat(tx_date_str.replace('Z', '+00:00'))
+                    tx_date = _parse_timestamp(tx_date_str)
                     
                     if date_from and tx_date.date() < date_from:
                         continue
@@ -18,6 +18,7 @@ from data.fetcher import DataFetcher
 from core.graph_builder import UnifiedGraphBuilder
 from src.api.stellar_client import StellarClient
 from src.analysis.wallet_analyzer import WalletAnalyzer
+from config.settings import bootstrap_filesystem
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -185,5 +186,6 @@ class StellarVizApp:
 
 
 if __name__ == "__main__":
+    bootstrap_filesystem()
     app = StellarVizApp()
     app.run()
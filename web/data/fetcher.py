@@ -6,6 +6,7 @@ Handles data fetching from Stellar API
 import streamlit as st
 import logging
 
+from config.settings import get_settings
 from src.api.stellar_client import StellarClient
 
 logger = logging.getLogger(__name__)
@@ -45,8 +46,15 @@ class DataFetcher:
         elif asset_filter and not isinstance(asset_filter, list):
             asset_filter = [asset_filter] if isinstance(asset_filter, str) else None
         
+        settings = get_settings()
+        cache_dir = settings.CACHE_DIR if settings.CACHE_ENABLED else None
+        
         async def fetch():
-            async with StellarClient() as client:
+            async with StellarClient(
+                cache_dir=cache_dir,
+                max_inflight_requests=settings.API_MAX_INFLIGHT,
+                cache_ttl=settings.CACHE_TTL
+            ) as client:
                 # Use depth=0 - ONLY start wallet transactions (ego-graph)
                 data = await client.fetch_wallet_network(
                     start_wallet=wallet_address,